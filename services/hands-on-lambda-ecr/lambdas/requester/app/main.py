@@ -3,11 +3,13 @@ import logging
 import sys
 
 import requests
+from app.profiling import profiled
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
 
+@profiled
 def lambda_handler(event, context):
     """AWS Lambda function handler.
     Try to make an HTTP GET request to a target URL and return the response.
@@ -110,4 +110,10 @@ resource "aws_lambda_function" "this" {
     aws_cloudwatch_log_group.lambda_log_group,
     aws_iam_role_policy_attachment.lambda_exec_policy_attachment
   ]
+
+  environment {
+    variables = {
+      PROFILING_SAMPLE_RATE = var.profiling_sample_rate
+    }
+  }
 }
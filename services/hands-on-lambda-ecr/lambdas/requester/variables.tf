@@ -51,3 +51,14 @@ variable "lambda_architecture" {
   type        = string
   default     = "arm64"
 }
+
+variable "profiling_sample_rate" {
+  description = "Fraction of invocations (0.0-1.0) to profile with cProfile and tracemalloc. 0 disables profiling."
+  type        = number
+  default     = 0
+
+  validation {
+    condition     = var.profiling_sample_rate >= 0 && var.profiling_sample_rate <= 1
+    error_message = "profiling_sample_rate must be between 0 and 1."
+  }
+}
@@ -2,25 +2,72 @@ import asyncio
 import json
 import logging
 import re
-from typing import Any, AsyncGenerator, Dict
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncGenerator, Awaitable, Callable, Dict, Iterable
 
 import boto3
+from app.resilience import CircuitBreaker
+from app.resilience import CircuitOpenError
+from app.resilience import LatencyTracker
+from app.resilience import TransportMetrics
+from app.resilience import backoff_delay
+from app.resilience import is_retryable_error
+from botocore.config import Config
 from botocore.eventstream import EventStream
 
 logger = logging.getLogger(__name__)
 
 # Boto3のクライアントはグローバルに一度だけ初期化
-lambda_client = boto3.client("lambda")
+# スロットリング・一時的な障害のリトライはトランスポート側でジッター付きで行うため、boto3側では行わない
+# (リトライ対象はis_retryable_errorでboto3のstandardモードに合わせている)
+lambda_client = boto3.client(
+    "lambda", config=Config(retries={"mode": "standard", "max_attempts": 1})
+)
+
+# ヘッジで追い越された呼び出しの完了をasyncio.run()の終了時に待たないよう、専用のExecutorを使う
+_invoke_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="mcp-invoke")
+
+# サーキットブレーカーは関数ごと、レイテンシ統計は(関数, ツール)ごとにコンテナ内で共有する
+# (実行時間の長い非ヘッジツールのレイテンシがヘッジ待機時間に混ざらないようにする)
+_circuit_breakers: Dict[str, CircuitBreaker] = {}
+_latency_trackers: Dict[tuple[str, str], LatencyTracker] = {}
+
+RETRY_MAX_ATTEMPTS = 3
+MAX_HEDGE_RATIO = 0.1
+
+# 直接呼び出しでツール一覧を取得するJSON-RPCメソッド名
+TOOLS_LIST_METHOD = "tools/list"
 
 
 class BotoMCPTransport:
     """boto3を使用してLambda経由でMCPサーバーと通信するトランスポート"""
 
-    def __init__(self, function_name: str, api_key: str | None = None):
+    def __init__(
+        self,
+        function_name: str,
+        api_key: str | None = None,
+        hedged_tools: Iterable[str] = (),
+        direct_invoke: bool = True,
+    ):
         if not function_name:
             raise ValueError("Lambda function_name is required.")
         self.function_name = function_name
         self.api_key = api_key
+        # Trueの場合はAPI Gatewayプロキシ形式を使わず、JSON-RPCイベントで直接呼び出す
+        self.direct_invoke = direct_invoke
+        # ヘッジ(重複呼び出し)してよいのは冪等な読み取り専用ツールのみ
+        self.hedged_tools = frozenset(hedged_tools)
+        self.circuit_breaker = _circuit_breakers.setdefault(
+            function_name, CircuitBreaker()
+        )
+        self.latency_trackers = {
+            method: _latency_trackers.setdefault(
+                (function_name, method), LatencyTracker()
+            )
+            for method in self.hedged_tools
+        }
+        self.metrics = TransportMetrics()
 
     def _create_lambda_payload(
         self, method: str, path: str, body: Dict | None = None
@@ -41,11 +88,32 @@ class BotoMCPTransport:
             payload["headers"]["X-Api-Key"] = self.api_key
         return payload
 
+    def _create_direct_payload(self, body: Dict) -> Dict[str, Any]:
+        """サーバーの直接呼び出し用JSON-RPCイベントを作成"""
+        payload = dict(body)
+        if self.api_key:
+            payload["api_key"] = self.api_key
+        return payload
+
     async def get_tools_stream(self) -> AsyncGenerator[Dict, None]:
         """
         サーバーにGETリクエストを送信し、SSEストリームを非同期で処理する。
         boto3のinvoke_with_response_streamは同期的なので、asyncioでラップする。
+        直接呼び出しが有効な場合は、tools/listのJSON-RPCレスポンスを1件返す。
         """
+        if self.direct_invoke:
+            payload = self._create_direct_payload(
+                {"jsonrpc": "2.0", "method": TOOLS_LIST_METHOD, "id": "0"}
+            )
+            payload_bytes = json.dumps(payload).encode("utf-8")
+            response_payload, _ = await self._with_retries(
+                lambda: asyncio.wrap_future(
+                    _invoke_executor.submit(self._invoke_sync, payload_bytes)
+                )
+            )
+            yield response_payload
+            return
+
         payload = self._create_lambda_payload("GET", "/mcp")
 
         def _invoke_in_executor():
@@ -56,7 +124,9 @@ class BotoMCPTransport:
             )
 
         loop = asyncio.get_running_loop()
-        response = await loop.run_in_executor(None, _invoke_in_executor)
+        response = await self._with_retries(
+            lambda: loop.run_in_executor(None, _invoke_in_executor)
+        )
 
         event_stream: EventStream = response.get("EventStream")
         if not event_stream:
@@ -78,25 +148,137 @@ class BotoMCPTransport:
                 break
 
     async def invoke_tool(self, tool_call: Dict) -> Dict:
-        """サーバーにPOSTリクエストを送信してツールを実行する"""
-        payload = self._create_lambda_payload("POST", "/mcp", body=tool_call)
+        """サーバーにPOSTリクエストを送信してツールを実行する
 
-        def _invoke_in_executor():
-            return lambda_client.invoke(
-                FunctionName=self.function_name,
-                Payload=json.dumps(payload).encode("utf-8"),
-                InvocationType="RequestResponse",
+        冪等なツールはp95レイテンシを超えた時点でヘッジ呼び出しを送信し、
+        先に返った応答を採用する。エラー率が高い場合はサーキットブレーカーにより即座に失敗する。
+        """
+        if not self.circuit_breaker.allow():
+            self.metrics.circuit_rejections += 1
+            raise CircuitOpenError(
+                f"Circuit breaker for '{self.function_name}' is open. Failing fast."
             )
 
-        loop = asyncio.get_running_loop()
-        response = await loop.run_in_executor(None, _invoke_in_executor)
+        if self.direct_invoke:
+            payload = self._create_direct_payload(tool_call)
+        else:
+            payload = self._create_lambda_payload("POST", "/mcp", body=tool_call)
+        payload_bytes = json.dumps(payload).encode("utf-8")
+        latency = self.latency_trackers.get(tool_call.get("method"))
 
-        response_payload_bytes = response["Payload"].read()
-        response_payload = json.loads(response_payload_bytes.decode("utf-8"))
+        self.metrics.invocations += 1
+        try:
+            response_payload, function_error = await self._with_retries(
+                lambda: (
+                    self._invoke_hedged(payload_bytes, latency)
+                    if latency
+                    else self._submit(payload_bytes)
+                )
+            )
+        except Exception:
+            self.metrics.failures += 1
+            self.circuit_breaker.record_failure()
+            raise
+        except BaseException:
+            # キャンセルされた呼び出しは成否を判定できないため、half_openの試行枠だけを解放する
+            self.circuit_breaker.release()
+            raise
+
+        # ツール自身が送出した例外はJSON-RPCエラーとして正常に返るため、障害として数えない。
+        # 障害として扱うのは呼び出しの失敗(例外・タイムアウト)とLambdaのFunctionErrorのみ
+        if function_error:
+            self.metrics.failures += 1
+            self.circuit_breaker.record_failure()
+        else:
+            self.circuit_breaker.record_success()
+
+        # 直接呼び出しのレスポンスはJSON-RPCレスポンスそのもの
+        if self.direct_invoke and not function_error:
+            return response_payload
 
         # Lambdaプロキシ統合のレスポンスからbodyを抽出
         if "body" in response_payload:
             return json.loads(response_payload["body"])
         else:
             logger.error(f"Unexpected Lambda response format: {response_payload}")
-            return {"error": "Invalid response format from server"} 
\ No newline at end of file
+            return {"error": "Invalid response format from server"}
+
+    async def _with_retries(self, invoke: Callable[[], Awaitable]) -> Any:
+        """スロットリングと一時的な障害のみジッター付き指数バックオフでリトライする"""
+        attempt = 0
+        while True:
+            try:
+                return await invoke()
+            except Exception as e:
+                attempt += 1
+                if not is_retryable_error(e) or attempt >= RETRY_MAX_ATTEMPTS:
+                    raise
+                delay = backoff_delay(attempt - 1)
+                self.metrics.retries += 1
+                logger.warning(
+                    f"Retryable error invoking '{self.function_name}': {e}."
+                    f" Retrying in {delay:.3f}s (attempt {attempt})."
+                )
+                await asyncio.sleep(delay)
+
+    async def _invoke_hedged(
+        self, payload_bytes: bytes, latency: LatencyTracker
+    ) -> tuple[Dict, str | None]:
+        """p95待っても応答がなければ重複呼び出しを送信し、先に成功した方を返す"""
+        primary = self._submit(payload_bytes, latency)
+        delay = latency.hedge_delay()
+        done, _ = await asyncio.wait({primary}, timeout=delay)
+        if done or not self._hedge_budget_available():
+            return await primary
+
+        logger.info(
+            f"No response from '{self.function_name}' after {delay:.3f}s."
+            " Sending hedged invocation."
+        )
+        self.metrics.hedges_sent += 1
+        hedged = self._submit(payload_bytes, latency)
+
+        pending = {primary, hedged}
+        first_error: BaseException | None = None
+        while pending:
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for future in done:
+                if future.exception() is not None:
+                    first_error = first_error or future.exception()
+                    continue
+                if future is hedged:
+                    self.metrics.hedge_wins += 1
+                for loser in pending:
+                    loser.cancel()
+                return future.result()
+        raise first_error
+
+    def _hedge_budget_available(self) -> bool:
+        """ヘッジによる追加負荷を呼び出し数の一定割合に抑える"""
+        return self.metrics.hedges_sent < self.metrics.invocations * MAX_HEDGE_RATIO + 1
+
+    def _submit(
+        self, payload_bytes: bytes, latency: LatencyTracker | None = None
+    ) -> asyncio.Future:
+        """Lambdaを専用Executorで呼び出し、latencyが指定されていれば完了した試行のレイテンシを記録する"""
+
+        def _invoke_in_executor() -> tuple[Dict, str | None]:
+            started = time.monotonic()
+            result = self._invoke_sync(payload_bytes)
+            if latency is not None:
+                latency.record(time.monotonic() - started)
+            return result
+
+        return asyncio.wrap_future(_invoke_executor.submit(_invoke_in_executor))
+
+    def _invoke_sync(self, payload_bytes: bytes) -> tuple[Dict, str | None]:
+        """Lambdaを同期的に呼び出し、デコード済みペイロードとFunctionErrorを返す"""
+        response = lambda_client.invoke(
+            FunctionName=self.function_name,
+            Payload=payload_bytes,
+            InvocationType="RequestResponse",
+        )
+        response_payload = json.loads(response["Payload"].read().decode("utf-8"))
+        return response_payload, response.get("FunctionError")
@@ -6,6 +6,11 @@ import os
 from app.aws_utils import get_secret_value
 # このファイルは mcp-client のため、mcp_client の import が必要です
 from app.mcp_client import GeminiMCPClient
+from app.profiling import profiled
+from app.warmup import consume_cold_start
+from app.warmup import handle_warmup
+from app.warmup import is_warmup_event
+from app.warmup import run_step
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -15,6 +20,13 @@ logger.setLevel(logging.INFO)
 # --- Environment Variables ---
 MCP_SERVER_EXAMPLE_SECRET_NAME = os.environ.get("MCP_SERVER_EXAMPLE_SECRET_NAME")
 COMMON_SECRET_NAME = os.environ.get("COMMON_SECRET_NAME")
+# ヘッジ呼び出しを許可する冪等な読み取り専用ツール(カンマ区切り)
+HEDGED_TOOLS = os.environ.get(
+    "HEDGED_TOOLS",
+    "databricks__list_schemas,databricks__list_tables,databricks__describe_table",
+)
+# "false"の場合はAPI Gatewayプロキシ形式でサーバーを呼び出す(直接呼び出し非対応のサーバー向け)
+MCP_DIRECT_INVOKE = os.environ.get("MCP_DIRECT_INVOKE", "true").lower() == "true"
 
 # --- Initialize Client at Cold Start ---
 client = None
@@ -42,6 +54,8 @@ try:
         gemini_api_key=gemini_api_key,
         server_function_name=server_function_name,
         server_api_key=x_api_key,  # APIキーを渡す
+        hedged_tools=[name.strip() for name in HEDGED_TOOLS.split(",") if name.strip()],
+        direct_invoke=MCP_DIRECT_INVOKE,
     )
     logger.info("Successfully initialized GeminiMCPClient with BotoMCPTransport.")
 
@@ -51,30 +65,66 @@ except Exception as e:
     )
 
 
+# Geminiの非同期クライアント(grpc_asyncio)は生成時のイベントループに紐づくため、
+# ウォームアップとクエリで同じイベントループを使い回す
+event_loop = asyncio.new_event_loop()
+asyncio.set_event_loop(event_loop)
+
+
 async def process_query(query: str):
     if not client:
         raise RuntimeError(
             "Client is not initialized. Check cold start logs for errors."
         )
 
-    logger.info("Initializing client for the request...")
-    await client.initialize()
+    # ツール一覧とエージェントはコンテナ内で使い回す(ウォームアップ済みならtools/listを再度呼ばない)
+    # サーバー側で一部のバックエンドが欠けていた場合は、次のリクエストで取得し直す
+    if not client.agent or client.unavailable_backends:
+        logger.info("Initializing client for the request...")
+        await client.initialize()
 
     logger.info(f"Processing query: {query}")
-    response_chunks = []
-    async for chunk in client.astream(query):
-        response_chunks.append(chunk)
+    result = await client.query(query)
 
     logger.info("Closing client resources.")
     await client.close()
 
-    return "".join(map(str, response_chunks))
+    return result
+
+
+def _require_client() -> None:
+    if not client:
+        raise RuntimeError(
+            "Client is not initialized. Check cold start logs for errors."
+        )
+
 
+def _fetch_tool_catalog() -> int:
+    event_loop.run_until_complete(client.initialize())
+    return len(client.tools)
 
+
+def warm_up() -> dict:
+    """LLMを実行せずに、クライアント・ツール一覧・Gemini接続を温める"""
+    steps = {"client": run_step(_require_client)}
+    if not steps["client"]["ok"]:
+        return steps
+    steps["tool_catalog"] = run_step(_fetch_tool_catalog)
+    steps["gemini_connection"] = run_step(
+        lambda: event_loop.run_until_complete(client.warm_up_model())
+    )
+    return steps
+
+
+@profiled
 def lambda_handler(event, context):
     """AWS Lambda handler function."""
     logger.info(f"Received event: {json.dumps(event)}")
 
+    cold_start = consume_cold_start()
+    if is_warmup_event(event):
+        return handle_warmup(event, context, warm_up, cold_start)
+
     try:
         body = json.loads(event.get("body", "{}"))
         query = body.get("message")
@@ -85,7 +135,7 @@ def lambda_handler(event, context):
                 "body": json.dumps({"error": "Query not provided in request body."}),
             }
 
-        result = asyncio.run(process_query(query))
+        result = event_loop.run_until_complete(process_query(query))
 
         return {"statusCode": 200, "body": json.dumps({"response": result})}
 
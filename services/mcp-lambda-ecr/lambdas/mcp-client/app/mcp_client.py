@@ -1,9 +1,11 @@
 import logging
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterable, List
 
 from app.boto_mcp_transport import BotoMCPTransport
+from google.ai.generativelanguage_v1beta.types import Content
+from google.ai.generativelanguage_v1beta.types import Part
 from langchain_core.messages import HumanMessage
-from langchain_core.tools import Tool
+from langchain_core.tools import StructuredTool
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langgraph.prebuilt import create_react_agent
 
@@ -19,6 +21,8 @@ class GeminiMCPClient:
         gemini_api_key: str,
         server_function_name: str,
         server_api_key: str | None = None,
+        hedged_tools: Iterable[str] = (),
+        direct_invoke: bool = True,
     ):
         logger.info(
             f"GeminiMCPClient __init__: Initializing for server"
@@ -28,16 +32,26 @@ class GeminiMCPClient:
             model="gemini-1.5-pro", google_api_key=gemini_api_key, temperature=0
         )
         self.transport = BotoMCPTransport(
-            function_name=server_function_name, api_key=server_api_key
+            function_name=server_function_name,
+            api_key=server_api_key,
+            hedged_tools=hedged_tools,
+            direct_invoke=direct_invoke,
         )
         self.agent = None
+        self.tools: List[StructuredTool] = []
+        # サーバーがツール一覧を取得できなかったバックエンドの名前空間
+        self.unavailable_backends: List[str] = []
         logger.info("GeminiMCPClient __init__: Completed.")
 
     async def initialize(self):
         """非同期でツールを取得し、エージェントを初期化する"""
         logger.info("Initializing agent by fetching remote tools...")
         tools = []
+        unavailable_backends = []
         async for tool_response in self.transport.get_tools_stream():
+            unavailable_backends.extend(
+                tool_response.get("result", {}).get("unavailable_backends", [])
+            )
             if tool_response.get("result", {}).get("tools"):
                 tool_definitions = tool_response["result"]["tools"]
                 logger.info(f"Received {len(tool_definitions)} tool definitions.")
@@ -69,18 +83,44 @@ class GeminiMCPClient:
 
                         return _tool_executor
 
-                    new_tool = Tool(
-                        name=tool_name,
-                        description=definition.get("function", {}).get("description"),
+                    new_tool = StructuredTool.from_function(
                         coroutine=create_tool_coroutine(tool_name, self.transport),
+                        name=tool_name,
+                        description=definition.get("function", {}).get("description")
+                        or "",
+                        args_schema=definition.get("function", {}).get("parameters")
+                        or {"type": "object", "properties": {}},
                     )
                     tools.append(new_tool)
 
         logger.info(
             f"Successfully created {len(tools)} tools: {[tool.name for tool in tools]}"
         )
+        if unavailable_backends:
+            logger.warning(
+                "Tool catalog is incomplete. Unavailable backends:"
+                f" {unavailable_backends}"
+            )
+        self.tools = tools
+        self.unavailable_backends = unavailable_backends
         self.agent = create_react_agent(self.model, tools)
 
+    async def warm_up_model(self) -> int:
+        """LLMの推論を行わずに、エージェントが使うGemini APIへの接続を確立する
+
+        エージェントは非同期クライアント(grpc_asyncio)を使い、このクライアントは実行中の
+        イベントループ上で初めて生成される。クエリと同じイベントループ上で呼び出すこと。
+        """
+        async_client = self.model.async_client
+        if async_client is None:
+            raise RuntimeError("Gemini async client requires a running event loop.")
+        response = await async_client.count_tokens(
+            model=self.model.model,
+            contents=[Content(parts=[Part(text="warmup")])],
+            metadata=self.model.default_metadata,
+        )
+        return response.total_tokens
+
     async def query(self, message: str) -> str:
         """エージェントにクエリを送信し、中間ログを出力する"""
         logger.info(f"Querying agent with message: {message}")
@@ -95,8 +135,13 @@ class GeminiMCPClient:
             {"messages": [HumanMessage(content=message)]}
         ):
             logger.info(f"Agent stream log: {log}")
-            if log.path.endswith("/__end__"):
-                final_state = log.data.get("output")
+            # final_output はノード名をキーとした状態の更新 (例: {"agent": {"messages": [...]}})
+            for op in log.ops:
+                if op["path"] != "/final_output" or not op["value"]:
+                    continue
+                for update in op["value"].values():
+                    if isinstance(update, dict) and update.get("messages"):
+                        final_state = update
 
         logger.info("Agent invocation finished.")
 
@@ -108,4 +153,4 @@ class GeminiMCPClient:
     async def close(self):
         """リソースをクリーンアップ"""
         logger.info("Closing client and cleaning up resources.")
-        pass
+        logger.info(f"Transport metrics: {self.transport.metrics.as_dict()}")
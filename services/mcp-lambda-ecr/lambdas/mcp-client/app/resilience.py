@@ -0,0 +1,192 @@
+import random
+import threading
+import time
+from collections import deque
+from dataclasses import asdict, dataclass
+
+from botocore.exceptions import ClientError
+from botocore.exceptions import ConnectionError
+from botocore.exceptions import HTTPClientError
+
+# スロットリングとして扱い、ジッター付きでリトライするエラーコード
+THROTTLING_ERROR_CODES = frozenset(
+    {
+        "TooManyRequestsException",
+        "ThrottlingException",
+        "Throttling",
+        "RequestLimitExceeded",
+        "EC2ThrottledException",
+    }
+)
+
+# 一時的な障害として扱い、スロットリングと同様にリトライするエラーコード
+# (boto3のstandardリトライモードがリトライ対象とするものに合わせる)
+TRANSIENT_ERROR_CODES = frozenset(
+    {
+        "ServiceException",
+        "RequestTimeout",
+        "RequestTimeoutException",
+        "PriorRequestNotComplete",
+    }
+)
+TRANSIENT_STATUS_CODES = frozenset({500, 502, 503, 504})
+
+
+class CircuitOpenError(RuntimeError):
+    """サーキットブレーカーが開いているため呼び出しを即座に拒否したことを示す例外"""
+
+
+def is_throttling_error(error: Exception) -> bool:
+    """boto3の例外がスロットリングによるものかを判定する"""
+    if not isinstance(error, ClientError):
+        return False
+    return error.response.get("Error", {}).get("Code") in THROTTLING_ERROR_CODES
+
+
+def is_retryable_error(error: Exception) -> bool:
+    """boto3の例外がスロットリング・一時的なサービス障害・接続エラーのいずれかかを判定する"""
+    if isinstance(error, (ConnectionError, HTTPClientError)):
+        return True
+    if not isinstance(error, ClientError):
+        return False
+    if is_throttling_error(error):
+        return True
+    code = error.response.get("Error", {}).get("Code")
+    status_code = error.response.get("ResponseMetadata", {}).get("HTTPStatusCode")
+    return code in TRANSIENT_ERROR_CODES or status_code in TRANSIENT_STATUS_CODES
+
+
+def backoff_delay(attempt: int, base: float = 0.1, cap: float = 2.0) -> float:
+    """Full Jitter方式の指数バックオフ待機時間(秒)を返す"""
+    return random.uniform(0, min(cap, base * (2**attempt)))
+
+
+class LatencyTracker:
+    """直近の呼び出しレイテンシを保持し、ヘッジ送信までの待機時間を算出する
+
+    レイテンシはワーカースレッドから記録されるため、ロックで保護する。
+    """
+
+    def __init__(
+        self,
+        window: int = 200,
+        percentile: float = 0.95,
+        min_samples: int = 20,
+        initial_delay: float = 1.0,
+        min_delay: float = 0.05,
+        max_delay: float = 10.0,
+    ):
+        self._samples: deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.initial_delay = initial_delay
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def hedge_delay(self) -> float:
+        """サンプルが十分にあればp95、なければ初期値をヘッジ待機時間として返す"""
+        with self._lock:
+            samples = sorted(self._samples)
+        if len(samples) < self.min_samples:
+            return self.initial_delay
+        index = min(len(samples) - 1, int(len(samples) * self.percentile))
+        return max(self.min_delay, min(self.max_delay, samples[index]))
+
+
+class CircuitBreaker:
+    """直近の呼び出し結果のエラー率に基づいて呼び出しを遮断するサーキットブレーカー
+
+    closed: 通常通り呼び出しを許可する
+    open: open_seconds の間は呼び出しを即座に拒否する
+    half_open: 試行呼び出しを1件だけ許可し、その結果で closed / open に遷移する
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        failure_rate_threshold: float = 0.5,
+        min_calls: int = 10,
+        window: int = 20,
+        open_seconds: float = 30.0,
+    ):
+        self.failure_rate_threshold = failure_rate_threshold
+        self.min_calls = min_calls
+        self.open_seconds = open_seconds
+        self._outcomes: deque[bool] = deque(maxlen=window)
+        self._state = self.CLOSED
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if (
+            self._state == self.OPEN
+            and time.monotonic() - self._opened_at >= self.open_seconds
+        ):
+            self._state = self.HALF_OPEN
+            self._trial_in_flight = False
+        return self._state
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == self.CLOSED:
+            return True
+        if state == self.HALF_OPEN and not self._trial_in_flight:
+            self._trial_in_flight = True
+            return True
+        return False
+
+    def record_success(self) -> None:
+        if self._state == self.HALF_OPEN:
+            self._outcomes.clear()
+            self._state = self.CLOSED
+        self._outcomes.append(True)
+
+    def release(self) -> None:
+        """結果を記録せずに終わった呼び出し(キャンセルなど)の試行枠を解放する"""
+        if self._state == self.HALF_OPEN:
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        if self._state == self.HALF_OPEN:
+            self._trip()
+            return
+        self._outcomes.append(False)
+        if len(self._outcomes) < self.min_calls:
+            return
+        failures = self._outcomes.count(False)
+        if failures / len(self._outcomes) >= self.failure_rate_threshold:
+            self._trip()
+
+    def _trip(self) -> None:
+        self._state = self.OPEN
+        self._opened_at = time.monotonic()
+        self._trial_in_flight = False
+        self._outcomes.clear()
+
+
+@dataclass
+class TransportMetrics:
+    """トランスポートのテールレイテンシ制御に関するカウンタ"""
+
+    invocations: int = 0
+    failures: int = 0
+    hedges_sent: int = 0
+    hedge_wins: int = 0
+    retries: int = 0
+    circuit_rejections: int = 0
+
+    def as_dict(self) -> dict:
+        metrics = asdict(self)
+        metrics["hedge_win_rate"] = (
+            self.hedge_wins / self.hedges_sent if self.hedges_sent else 0.0
+        )
+        return metrics
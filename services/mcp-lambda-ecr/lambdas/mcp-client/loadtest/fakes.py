@@ -0,0 +1,101 @@
+"""負荷試験ハーネス(replay.py)で使う記録用コールバックとリプレイ用のフェイク"""
+
+import asyncio
+import json
+import time
+from collections import defaultdict
+from typing import Any, Dict, List
+
+from app.resilience import TransportMetrics
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.messages import message_chunk_to_message
+from langchain_core.messages import messages_from_dict
+from langchain_core.messages import messages_to_dict
+from langchain_core.outputs import ChatGeneration
+from langchain_core.outputs import ChatResult
+from pydantic import Field
+
+
+def _tool_call_key(method: str, params: Dict) -> str:
+    return f"{method}:{json.dumps(params, sort_keys=True, default=str)}"
+
+
+class LLMRecorder(BaseCallbackHandler):
+    """チャットモデルの応答メッセージとレイテンシを記録するコールバック"""
+
+    def __init__(self):
+        self.responses: List[Dict[str, Any]] = []
+        self._started: Dict[Any, float] = {}
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        self._started[run_id] = time.perf_counter()
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        started = self._started.pop(run_id, time.perf_counter())
+        message = message_chunk_to_message(response.generations[0][0].message)
+        self.responses.append(
+            {
+                "message": messages_to_dict([message])[0],
+                "latency_ms": (time.perf_counter() - started) * 1000,
+            }
+        )
+
+
+class ReplayChatModel(BaseChatModel):
+    """記録済みのAIメッセージを順番に返すフェイクのチャットモデル"""
+
+    script: List[Dict[str, Any]] = Field(default_factory=list)
+    latency_scale: float = 0.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "replay"
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        if not self.script:
+            message = AIMessage(content="Replay script exhausted.")
+        else:
+            response = self.script.pop(0)
+            message = messages_from_dict([response["message"]])[0]
+            time.sleep(response.get("latency_ms", 0) / 1000 * self.latency_scale)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+class ReplayTransport:
+    """記録済みのツール一覧・ツール応答を返すフェイクのトランスポート"""
+
+    tools: List[Dict] = []
+    responses: Dict[str, List[Dict[str, Any]]] = {}
+    latency_scale: float = 0.0
+
+    def __init__(self, function_name: str, api_key: str | None = None, **kwargs):
+        self.function_name = function_name
+        self.metrics = TransportMetrics()
+
+    @classmethod
+    def load_session(cls, session: Dict[str, Any]) -> None:
+        responses = defaultdict(list)
+        for call in session["tool_calls"]:
+            responses[_tool_call_key(call["method"], call["params"])].append(call)
+        cls.responses = responses
+
+    async def get_tools_stream(self):
+        for response in self.tools:
+            yield response
+
+    async def invoke_tool(self, tool_call: Dict) -> Dict:
+        self.metrics.invocations += 1
+        calls = self.responses.get(
+            _tool_call_key(tool_call.get("method"), tool_call.get("params", {}))
+        )
+        if not calls:
+            self.metrics.failures += 1
+            return {"error": f"No recorded response for {tool_call.get('method')}"}
+        call = calls.pop(0) if len(calls) > 1 else calls[0]
+        await asyncio.sleep(call.get("latency_ms", 0) / 1000 * self.latency_scale)
+        return call["response"]
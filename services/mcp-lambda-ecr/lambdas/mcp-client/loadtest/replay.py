@@ -0,0 +1,284 @@
+"""mcp-client の lambda_handler を、記録済みのセッションで並列にリプレイする負荷試験ハーネス
+
+1. record: 実際のGeminiとサーバーLambdaを使ってクエリを実行し、LLMの応答とツールの応答を記録する
+2. replay: 記録したフィクスチャをフェイクのモデル/トランスポートで再生し、
+   lambda_handler のレイテンシ(p50/p99)、クエリあたりのCPU時間、ピークRSSを計測する
+
+replay では1プロセスを1コンテナとみなし、各プロセスの最初の呼び出し(importを含む)を
+コールド、それ以降をウォームとして分けて集計する。
+
+Usage (mcp-client ディレクトリで実行):
+    uv run python -m loadtest.replay record --queries queries.txt --output fixture.json
+    uv run python -m loadtest.replay replay --fixture fixture.json --concurrency 4
+"""
+
+import argparse
+import json
+import logging
+import math
+import multiprocessing
+import os
+import resource
+import statistics
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List
+
+logger = logging.getLogger(__name__)
+
+
+# --------------------
+# Recording
+#
+def record(queries: List[str], output: str) -> None:
+    """実環境でクエリを実行し、LLMとツールの応答をフィクスチャとして保存する"""
+    import app.main
+    from loadtest.fakes import LLMRecorder
+
+    client = app.main.client
+    if not client:
+        raise RuntimeError("Client is not initialized. Check the environment.")
+
+    transport = client.transport
+    original_get_tools_stream = transport.get_tools_stream
+    original_invoke_tool = transport.invoke_tool
+    tools: List[Dict] = []
+    tool_calls: List[Dict[str, Any]] = []
+
+    async def recording_get_tools_stream():
+        responses = [response async for response in original_get_tools_stream()]
+        if not tools:
+            tools.extend(responses)
+        for response in responses:
+            yield response
+
+    async def recording_invoke_tool(tool_call: Dict) -> Dict:
+        started = time.perf_counter()
+        response = await original_invoke_tool(tool_call)
+        tool_calls.append(
+            {
+                "method": tool_call.get("method"),
+                "params": tool_call.get("params", {}),
+                "response": response,
+                "latency_ms": (time.perf_counter() - started) * 1000,
+            }
+        )
+        return response
+
+    transport.get_tools_stream = recording_get_tools_stream
+    transport.invoke_tool = recording_invoke_tool
+    recorder = LLMRecorder()
+    client.model.callbacks = [recorder]
+
+    sessions = []
+    for query in queries:
+        recorder.responses = []
+        tool_calls.clear()
+        answer = app.main.event_loop.run_until_complete(app.main.process_query(query))
+        sessions.append(
+            {
+                "query": query,
+                "answer": answer,
+                "llm_responses": list(recorder.responses),
+                "tool_calls": list(tool_calls),
+            }
+        )
+        logger.info(
+            f"Recorded session: {len(recorder.responses)} LLM responses,"
+            f" {len(tool_calls)} tool calls."
+        )
+
+    with open(output, "w") as f:
+        json.dump({"tools": tools, "sessions": sessions}, f, ensure_ascii=False)
+    logger.info(f"Saved {len(sessions)} sessions to {output}.")
+
+
+# --------------------
+# Replay
+#
+class _FakeContext:
+    function_name = "mcp-client-replay"
+    aws_request_id = "replay"
+
+
+def _replay_worker(
+    fixture_path: str, session_indexes: List[int], latency_scale: float, log_file: str
+) -> Dict[str, Any]:
+    """1コンテナ相当のプロセスで、importからセッションの再生までを計測する"""
+    logging.basicConfig(
+        level=logging.INFO, filename=log_file, format="%(levelname)s %(message)s"
+    )
+    os.environ.setdefault("AWS_DEFAULT_REGION", "ap-northeast-1")
+
+    with open(fixture_path) as f:
+        fixture = json.load(f)
+
+    init_started = time.perf_counter()
+    init_cpu_started = time.process_time()
+
+    # フェイクとアプリのimportはどちらもコールドスタートの計測に含める
+    import app.aws_utils
+    import app.mcp_client
+    from loadtest.fakes import ReplayChatModel
+    from loadtest.fakes import ReplayTransport
+
+    app.aws_utils.get_secret_value = lambda name, key: f"replay-{key}"
+    app.mcp_client.ChatGoogleGenerativeAI = (
+        lambda **kwargs: ReplayChatModel(latency_scale=latency_scale)
+    )
+    app.mcp_client.BotoMCPTransport = ReplayTransport
+    ReplayTransport.tools = fixture["tools"]
+    ReplayTransport.latency_scale = latency_scale
+
+    import app.main
+
+    init_ms = (time.perf_counter() - init_started) * 1000
+    init_cpu_ms = (time.process_time() - init_cpu_started) * 1000
+
+    results = []
+    for i, index in enumerate(session_indexes):
+        session = fixture["sessions"][index]
+        ReplayTransport.load_session(session)
+        app.main.client.model.script = list(session["llm_responses"])
+        event = {"body": json.dumps({"message": session["query"]})}
+
+        started = time.perf_counter()
+        cpu_started = time.process_time()
+        response = app.main.lambda_handler(event, _FakeContext())
+        latency_ms = (time.perf_counter() - started) * 1000
+        cpu_ms = (time.process_time() - cpu_started) * 1000
+
+        cold = i == 0
+        results.append(
+            {
+                "phase": "cold" if cold else "warm",
+                # コールドはimport(INIT)を含めたレイテンシとする
+                "latency_ms": latency_ms + (init_ms if cold else 0),
+                "cpu_ms": cpu_ms + (init_cpu_ms if cold else 0),
+                "ok": response.get("statusCode") == 200,
+            }
+        )
+
+    return {
+        "init_ms": init_ms,
+        # Linuxではru_maxrssの単位はKiB
+        "max_rss_kib": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        "results": results,
+    }
+
+
+def _percentile(values: List[float], percentile: float) -> float:
+    """nearest-rank方式のパーセンタイル"""
+    ordered = sorted(values)
+    rank = max(1, math.ceil(percentile / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def _summarize(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    latencies = [r["latency_ms"] for r in results]
+    cpu = [r["cpu_ms"] for r in results]
+    return {
+        "count": len(results),
+        "errors": sum(1 for r in results if not r["ok"]),
+        "p50_ms": round(_percentile(latencies, 50), 1),
+        "p99_ms": round(_percentile(latencies, 99), 1),
+        "cpu_ms_per_query": round(statistics.mean(cpu), 1),
+    }
+
+
+def replay(
+    fixture_path: str,
+    concurrency: int,
+    requests_per_worker: int,
+    latency_scale: float,
+    log_file: str,
+) -> Dict[str, Any]:
+    """フィクスチャを concurrency 個のプロセスで並列に再生し、結果を集計する"""
+    with open(fixture_path) as f:
+        session_count = len(json.load(f)["sessions"])
+    if not session_count:
+        raise ValueError(f"No sessions recorded in {fixture_path}.")
+
+    assignments = [
+        [(worker + i * concurrency) % session_count for i in range(requests_per_worker)]
+        for worker in range(concurrency)
+    ]
+
+    started = time.perf_counter()
+    # spawnで毎回新しいプロセスを起動し、各プロセスのimportをコールドスタートとして計測する
+    with ProcessPoolExecutor(
+        max_workers=concurrency,
+        mp_context=multiprocessing.get_context("spawn"),
+        max_tasks_per_child=1,
+    ) as executor:
+        workers = list(
+            executor.map(
+                _replay_worker,
+                [fixture_path] * concurrency,
+                assignments,
+                [latency_scale] * concurrency,
+                [log_file] * concurrency,
+            )
+        )
+    elapsed = time.perf_counter() - started
+
+    results = [result for worker in workers for result in worker["results"]]
+    report = {
+        "concurrency": concurrency,
+        "queries": len(results),
+        "throughput_qps": round(len(results) / elapsed, 2),
+        "peak_rss_kib": max(worker["max_rss_kib"] for worker in workers),
+        "init_ms_p50": round(_percentile([w["init_ms"] for w in workers], 50), 1),
+    }
+    for phase in ("cold", "warm"):
+        phase_results = [r for r in results if r["phase"] == phase]
+        if phase_results:
+            report[phase] = _summarize(phase_results)
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    record_parser = subparsers.add_parser("record", help="record sessions")
+    record_parser.add_argument(
+        "--queries", required=True, help="text file with one query per line"
+    )
+    record_parser.add_argument("--output", required=True, help="fixture JSON path")
+
+    replay_parser = subparsers.add_parser("replay", help="replay recorded sessions")
+    replay_parser.add_argument("--fixture", required=True, help="fixture JSON path")
+    replay_parser.add_argument("--concurrency", type=int, default=4)
+    replay_parser.add_argument("--requests-per-worker", type=int, default=10)
+    replay_parser.add_argument(
+        "--latency-scale",
+        type=float,
+        default=0.0,
+        help="multiplier for recorded LLM/tool latencies (0 measures CPU cost only)",
+    )
+    replay_parser.add_argument(
+        "--log-file",
+        default=os.devnull,
+        help="handler log destination (logging cost is included in measurements)",
+    )
+
+    args = parser.parse_args()
+    if args.command == "record":
+        logging.basicConfig(level=logging.INFO)
+        with open(args.queries) as f:
+            queries = [line.strip() for line in f if line.strip()]
+        record(queries, args.output)
+    else:
+        report = replay(
+            args.fixture,
+            args.concurrency,
+            args.requests_per_worker,
+            args.latency_scale,
+            args.log_file,
+        )
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -95,7 +95,9 @@ resource "aws_iam_policy" "lambda_exec_policy" {
         Action = "lambda:InvokeFunction",
         Effect = "Allow",
         Resource = [
-          "arn:aws:lambda:${var.aws_region}:${data.aws_caller_identity.current.account_id}:function:${var.project_name}-${var.environment}-mcp-server-example"
+          "arn:aws:lambda:${var.aws_region}:${data.aws_caller_identity.current.account_id}:function:${var.project_name}-${var.environment}-mcp-server-example",
+          # Warm-up pings fan out by invoking this function itself
+          "arn:aws:lambda:${var.aws_region}:${data.aws_caller_identity.current.account_id}:function:${local.lambda_function_name}"
         ]
       }
     ]
@@ -155,6 +157,41 @@ resource "aws_lambda_function" "this" {
     variables = {
       COMMON_SECRET_NAME             = data.aws_secretsmanager_secret_version.common.secret_id
       MCP_SERVER_EXAMPLE_SECRET_NAME = data.aws_secretsmanager_secret_version.mcp_server_example.secret_id
+      PROFILING_SAMPLE_RATE          = var.profiling_sample_rate
+      MCP_DIRECT_INVOKE              = var.mcp_direct_invoke
     }
   }
 }
+
+# --------------------
+# Resources for scheduled warm-up
+#
+resource "aws_cloudwatch_event_rule" "warmup" {
+  count = var.warmup_schedule_expression != null ? 1 : 0
+
+  name                = "${local.lambda_function_name}-warmup"
+  description         = "Scheduled warm-up pings for ${local.lambda_function_name}"
+  schedule_expression = var.warmup_schedule_expression
+}
+
+resource "aws_cloudwatch_event_target" "warmup" {
+  count = var.warmup_schedule_expression != null ? 1 : 0
+
+  rule = aws_cloudwatch_event_rule.warmup[0].name
+  arn  = aws_lambda_function.this.arn
+  input = jsonencode({
+    warmup = {
+      concurrency = var.warmup_concurrency
+    }
+  })
+}
+
+resource "aws_lambda_permission" "warmup" {
+  count = var.warmup_schedule_expression != null ? 1 : 0
+
+  statement_id  = "AllowExecutionFromEventBridgeWarmup"
+  action        = "lambda:InvokeFunction"
+  function_name = aws_lambda_function.this.function_name
+  principal     = "events.amazonaws.com"
+  source_arn    = aws_cloudwatch_event_rule.warmup[0].arn
+}
@@ -0,0 +1,4 @@
+import os
+
+# app.boto_mcp_transport はimport時にboto3クライアントを生成するため、リージョンを設定しておく
+os.environ.setdefault("AWS_DEFAULT_REGION", "ap-northeast-1")
@@ -0,0 +1,181 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from app import boto_mcp_transport
+from app.boto_mcp_transport import BotoMCPTransport
+from app.resilience import CircuitBreaker
+from app.resilience import CircuitOpenError
+from app.resilience import LatencyTracker
+from botocore.exceptions import ClientError
+
+TOOL_CALL = {"jsonrpc": "2.0", "method": "example__read", "params": {}, "id": "1"}
+OK_RESPONSE = {"jsonrpc": "2.0", "id": "1", "result": "ok"}
+
+
+def client_error(code: str, status_code: int) -> ClientError:
+    return ClientError(
+        {"Error": {"Code": code}, "ResponseMetadata": {"HTTPStatusCode": status_code}},
+        "Invoke",
+    )
+
+
+@pytest.fixture(autouse=True)
+def isolated_state(monkeypatch):
+    monkeypatch.setattr(boto_mcp_transport, "_circuit_breakers", {})
+    monkeypatch.setattr(boto_mcp_transport, "_latency_trackers", {})
+    monkeypatch.setattr(boto_mcp_transport, "backoff_delay", lambda attempt: 0)
+
+
+def make_transport(monkeypatch, invoke, **kwargs) -> BotoMCPTransport:
+    transport = BotoMCPTransport("mcp-server", **kwargs)
+    monkeypatch.setattr(transport, "_invoke_sync", invoke)
+    return transport
+
+
+def test_tool_error_response_does_not_count_as_failure(monkeypatch):
+    tool_error = {"jsonrpc": "2.0", "id": "1", "error": {"code": -32603}}
+    transport = make_transport(monkeypatch, lambda payload: (tool_error, None))
+    transport.circuit_breaker = CircuitBreaker(min_calls=1)
+
+    assert asyncio.run(transport.invoke_tool(TOOL_CALL)) == tool_error
+    assert transport.circuit_breaker.state == CircuitBreaker.CLOSED
+    assert transport.metrics.failures == 0
+
+
+def test_function_error_counts_as_failure(monkeypatch):
+    crash = {"errorMessage": "boom"}
+    transport = make_transport(monkeypatch, lambda payload: (crash, "Unhandled"))
+    transport.circuit_breaker = CircuitBreaker(min_calls=1)
+
+    asyncio.run(transport.invoke_tool(TOOL_CALL))
+    assert transport.circuit_breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError):
+        asyncio.run(transport.invoke_tool(TOOL_CALL))
+    assert transport.metrics.circuit_rejections == 1
+
+
+def test_transient_errors_are_retried(monkeypatch):
+    errors = [client_error("TooManyRequestsException", 429)]
+    errors.append(client_error("ServiceException", 500))
+
+    def invoke(payload):
+        if errors:
+            raise errors.pop(0)
+        return OK_RESPONSE, None
+
+    transport = make_transport(monkeypatch, invoke)
+    assert asyncio.run(transport.invoke_tool(TOOL_CALL)) == OK_RESPONSE
+    assert transport.metrics.retries == 2
+    assert transport.metrics.failures == 0
+
+
+def test_retries_give_up_after_max_attempts(monkeypatch):
+    def invoke(payload):
+        raise client_error("ServiceException", 500)
+
+    transport = make_transport(monkeypatch, invoke)
+    with pytest.raises(ClientError):
+        asyncio.run(transport.invoke_tool(TOOL_CALL))
+    assert transport.metrics.retries == boto_mcp_transport.RETRY_MAX_ATTEMPTS - 1
+    assert transport.metrics.failures == 1
+
+
+def test_permanent_errors_are_not_retried(monkeypatch):
+    def invoke(payload):
+        raise client_error("ResourceNotFoundException", 404)
+
+    transport = make_transport(monkeypatch, invoke)
+    with pytest.raises(ClientError):
+        asyncio.run(transport.invoke_tool(TOOL_CALL))
+    assert transport.metrics.retries == 0
+
+
+def test_slow_call_is_hedged_and_fastest_response_wins(monkeypatch):
+    calls = []
+    slow_response = {"jsonrpc": "2.0", "id": "1", "result": "slow"}
+
+    def invoke(payload):
+        calls.append(payload)
+        if len(calls) == 1:
+            time.sleep(0.5)
+            return slow_response, None
+        return OK_RESPONSE, None
+
+    transport = make_transport(
+        monkeypatch, invoke, hedged_tools=[TOOL_CALL["method"]]
+    )
+    transport.latency_trackers[TOOL_CALL["method"]] = LatencyTracker(
+        initial_delay=0.05
+    )
+
+    assert asyncio.run(transport.invoke_tool(TOOL_CALL)) == OK_RESPONSE
+    assert len(calls) == 2
+    assert transport.metrics.hedges_sent == 1
+    assert transport.metrics.hedge_wins == 1
+
+
+def test_non_idempotent_tool_is_not_hedged(monkeypatch):
+    calls = []
+
+    def invoke(payload):
+        calls.append(payload)
+        time.sleep(0.2)
+        return OK_RESPONSE, None
+
+    transport = make_transport(monkeypatch, invoke)
+
+    assert asyncio.run(transport.invoke_tool(TOOL_CALL)) == OK_RESPONSE
+    assert len(calls) == 1
+    assert transport.metrics.hedges_sent == 0
+
+
+def test_slow_non_hedged_calls_do_not_raise_hedge_delay(monkeypatch):
+    slow_call = dict(TOOL_CALL, method="example__execute_sql_query")
+
+    def invoke(payload):
+        if b"execute_sql_query" in payload:
+            time.sleep(0.05)
+        return OK_RESPONSE, None
+
+    transport = make_transport(
+        monkeypatch, invoke, hedged_tools=[TOOL_CALL["method"]]
+    )
+    tracker = LatencyTracker(min_samples=5, initial_delay=1.0, min_delay=0.001)
+    transport.latency_trackers[TOOL_CALL["method"]] = tracker
+
+    async def run_queries():
+        for _ in range(6):
+            await transport.invoke_tool(slow_call)
+        for _ in range(5):
+            await transport.invoke_tool(TOOL_CALL)
+
+    asyncio.run(run_queries())
+    assert tracker.hedge_delay() < 0.05
+
+
+def test_cancelled_trial_releases_half_open_breaker(monkeypatch):
+    release = threading.Event()
+
+    def invoke(payload):
+        release.wait(timeout=5)
+        return OK_RESPONSE, None
+
+    transport = make_transport(monkeypatch, invoke)
+    transport.circuit_breaker = CircuitBreaker(min_calls=1, open_seconds=0)
+    transport.circuit_breaker.record_failure()
+
+    async def cancel_trial():
+        task = asyncio.create_task(transport.invoke_tool(TOOL_CALL))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    try:
+        asyncio.run(cancel_trial())
+    finally:
+        release.set()
+    assert transport.circuit_breaker.state == CircuitBreaker.HALF_OPEN
+    assert transport.circuit_breaker.allow()
@@ -0,0 +1,124 @@
+import pytest
+from app import resilience
+from app.resilience import CircuitBreaker
+from app.resilience import LatencyTracker
+from app.resilience import backoff_delay
+from app.resilience import is_retryable_error
+from app.resilience import is_throttling_error
+from botocore.exceptions import ClientError
+from botocore.exceptions import EndpointConnectionError
+from botocore.exceptions import ReadTimeoutError
+
+
+def client_error(code: str, status_code: int = 400) -> ClientError:
+    return ClientError(
+        {"Error": {"Code": code}, "ResponseMetadata": {"HTTPStatusCode": status_code}},
+        "Invoke",
+    )
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(resilience.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_throttling_error_is_retryable():
+    error = client_error("TooManyRequestsException", 429)
+    assert is_throttling_error(error)
+    assert is_retryable_error(error)
+
+
+@pytest.mark.parametrize(
+    "error",
+    [
+        client_error("ServiceException", 500),
+        client_error("SomethingNew", 503),
+        EndpointConnectionError(endpoint_url="https://lambda"),
+        ReadTimeoutError(endpoint_url="https://lambda"),
+    ],
+)
+def test_transient_errors_are_retryable(error):
+    assert not is_throttling_error(error)
+    assert is_retryable_error(error)
+
+
+@pytest.mark.parametrize(
+    "error",
+    [
+        client_error("ResourceNotFoundException", 404),
+        client_error("InvalidRequestContentException", 400),
+        ValueError("bad payload"),
+    ],
+)
+def test_permanent_errors_are_not_retryable(error):
+    assert not is_retryable_error(error)
+
+
+def test_backoff_delay_is_capped():
+    for attempt in range(10):
+        assert 0 <= backoff_delay(attempt, base=0.1, cap=0.5) <= 0.5
+
+
+def test_latency_tracker_uses_initial_delay_until_enough_samples():
+    tracker = LatencyTracker(min_samples=3, initial_delay=1.0)
+    tracker.record(0.1)
+    assert tracker.hedge_delay() == 1.0
+
+
+def test_latency_tracker_returns_clamped_percentile():
+    tracker = LatencyTracker(min_samples=1, percentile=0.95, max_delay=5.0)
+    for i in range(1, 101):
+        tracker.record(i / 100)
+    assert tracker.hedge_delay() == pytest.approx(0.96)
+
+
+def test_latency_tracker_clamps_to_max_delay():
+    tracker = LatencyTracker(min_samples=1, max_delay=5.0)
+    tracker.record(100.0)
+    assert tracker.hedge_delay() == 5.0
+
+
+def test_breaker_opens_when_failure_rate_exceeds_threshold(clock):
+    breaker = CircuitBreaker(failure_rate_threshold=0.5, min_calls=4)
+    for _ in range(2):
+        breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+
+
+def test_breaker_allows_single_trial_after_cooldown(clock):
+    breaker = CircuitBreaker(min_calls=1, open_seconds=30)
+    breaker.record_failure()
+    clock[0] += 30
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow()
+    assert not breaker.allow()
+
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow()
+
+
+def test_breaker_reopens_when_trial_fails(clock):
+    breaker = CircuitBreaker(min_calls=1, open_seconds=30)
+    breaker.record_failure()
+    clock[0] += 30
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+
+
+def test_released_trial_lets_next_call_through(clock):
+    breaker = CircuitBreaker(min_calls=1, open_seconds=30)
+    breaker.record_failure()
+    clock[0] += 30
+    assert breaker.allow()
+    breaker.release()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow()
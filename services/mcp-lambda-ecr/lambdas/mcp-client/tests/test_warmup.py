@@ -0,0 +1,61 @@
+from types import SimpleNamespace
+
+import pytest
+from app import warmup
+
+CONTEXT = SimpleNamespace(function_name="mcp-client")
+
+
+def ready_steps():
+    return {"client": {"ok": True, "ms": 0.0}}
+
+
+@pytest.fixture(autouse=True)
+def fresh_container(monkeypatch):
+    monkeypatch.setattr(warmup, "_cold_start", True)
+
+
+def test_only_first_invocation_is_cold():
+    assert warmup.consume_cold_start()
+    assert not warmup.consume_cold_start()
+
+
+def test_warmup_after_real_traffic_is_not_cold():
+    warmup.consume_cold_start()  # 通常のリクエスト
+
+    report = warmup.handle_warmup(
+        {"warmup": {"hold_ms": 0}},
+        CONTEXT,
+        ready_steps,
+        warmup.consume_cold_start(),
+    )
+    assert report["cold_start"] is False
+    assert report["ready"] is True
+
+
+@pytest.mark.parametrize(
+    "settings, expected",
+    [
+        ({"concurrency": "many", "hold_ms": 0}, "concurrency='many' is not an integer"),
+        ({"hold_ms": -5}, "hold_ms=-5 is out of range"),
+        ({"hold_ms": None}, "hold_ms=None is not an integer"),
+        ("fast", "warmup='fast' is not an object"),
+    ],
+)
+def test_invalid_settings_are_reported(monkeypatch, settings, expected):
+    monkeypatch.setattr(warmup, "DEFAULT_HOLD_MS", 0)
+
+    report = warmup.handle_warmup({"warmup": settings}, CONTEXT, ready_steps, False)
+    assert report["ready"] is True
+    assert any(expected in problem for problem in report["invalid_settings"])
+
+
+def test_concurrency_is_clamped_and_reported(monkeypatch):
+    monkeypatch.setattr(warmup, "_invoke_self", lambda name, hold_ms: {"ready": True})
+
+    summary = warmup.handle_warmup(
+        {"warmup": {"concurrency": 1000, "hold_ms": 0}}, CONTEXT, ready_steps, False
+    )
+    assert summary["requested"] == warmup.MAX_WARMUP_CONCURRENCY
+    assert summary["ready"] == warmup.MAX_WARMUP_CONCURRENCY
+    assert "concurrency=1000 is out of range" in summary["invalid_settings"][0]
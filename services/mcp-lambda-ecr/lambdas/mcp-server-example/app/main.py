@@ -1,9 +1,20 @@
+import asyncio
 import json
 import logging
 import os
 
 from app.aws_utils import get_secret_value
+from app.profiling import profiled
+from app.registry import ToolRegistry
+from app.server import INTERNAL_ERROR
 from app.server import create_app
+from app.server import handle_direct_invocation
+from app.server import is_direct_invocation
+from app.server import jsonrpc_error
+from app.warmup import consume_cold_start
+from app.warmup import handle_warmup
+from app.warmup import is_warmup_event
+from app.warmup import run_step
 from mangum import Mangum
 
 logger = logging.getLogger(__name__)
@@ -14,9 +25,14 @@ logger.setLevel(logging.INFO)
 AUTH_SECRET_NAME = os.environ.get("COMMON_SECRET_NAME")
 # ラップ対象のサーバーが必要とする設定(環境変数)がJSON形式で入ったSecret名
 CONFIG_SECRET_NAME = os.environ.get("CONFIG_SECRET_NAME")
+# ラップ対象のMCPサーバー(JSON形式: {名前空間: {"module": ..., "object": ...}})
+MCP_SERVERS = os.environ.get("MCP_SERVERS")
 
 # --- Initialization at Cold Start ---
 app = None
+auth_api_key = None
+registry = None
+initialization_error = None
 try:
     logger.info("Initializing application at cold start...")
 
@@ -41,8 +57,10 @@ try:
         except json.JSONDecodeError:
             raise ValueError(f"Failed to parse secret '{CONFIG_SECRET_NAME}' as JSON.")
 
-    # 3. FastAPIアプリケーションを生成
-    app = create_app(auth_api_key=auth_api_key)
+    # 3. ツールレジストリとFastAPIアプリケーションを生成
+    # 各MCPサーバーのimportはツールが最初に必要になった時点まで遅延する
+    registry = ToolRegistry.from_config(MCP_SERVERS)
+    app = create_app(auth_api_key=auth_api_key, registry=registry)
 
     logger.info("Application initialized successfully.")
 
@@ -70,4 +88,57 @@ except Exception as e:
     app = error_app  # グローバルのapp変数にエラー報告用アプリをセット
 
 # --- Lambda Handler ---
-lambda_handler = Mangum(app, lifespan="off")
+# 直接呼び出しとMangumで同じイベントループを使い回し、ツール側の非同期リソースを再利用する
+event_loop = asyncio.new_event_loop()
+asyncio.set_event_loop(event_loop)
+
+asgi_handler = Mangum(app, lifespan="off")
+
+
+def _require_initialized() -> None:
+    if registry is None:
+        raise RuntimeError(f"Initialization failed: {initialization_error}")
+
+
+def _build_tool_catalog() -> int:
+    event_loop.run_until_complete(registry.sse_catalog())
+    return len(event_loop.run_until_complete(registry.list_tools()))
+
+
+def warm_up() -> dict:
+    """データに触れずに、シークレット・ツール一覧・各バックエンドを温める"""
+    steps = {"secrets": run_step(_require_initialized)}
+    if not steps["secrets"]["ok"]:
+        return steps
+    steps["tool_catalog"] = run_step(_build_tool_catalog)
+    steps["backends"] = run_step(
+        lambda: event_loop.run_until_complete(registry.warm_up())
+    )
+    return steps
+
+
+@profiled
+def lambda_handler(event, context):
+    """AWS Lambda handler function.
+
+    Lambda間の直接呼び出し(JSON-RPCイベント)はツールレジストリで直接処理し、
+    API Gateway形式のイベントはMangum経由でFastAPIアプリに渡す。
+    """
+    cold_start = consume_cold_start()
+    if is_warmup_event(event):
+        return handle_warmup(event, context, warm_up, cold_start)
+
+    if not is_direct_invocation(event):
+        return asgi_handler(event, context)
+
+    if registry is None:
+        return jsonrpc_error(
+            event.get("id", "1"),
+            INTERNAL_ERROR,
+            "Service unavailable due to initialization failure",
+            str(initialization_error),
+        )
+
+    return event_loop.run_until_complete(
+        handle_direct_invocation(event, registry, auth_api_key)
+    )
@@ -0,0 +1,193 @@
+import cProfile
+import functools
+import importlib
+import io
+import json
+import logging
+import os
+import pstats
+import random
+import resource
+import time
+import tracemalloc
+import uuid
+from typing import Any, Callable
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+_invalid_settings: list[str] = []
+
+
+def _env_setting(
+    name: str, default: str, parse: Callable, is_valid: Callable[[Any], bool]
+) -> Any:
+    """環境変数を読み取る。不正な値はimport時に例外とせず、記録して既定値を返す"""
+    raw = os.environ.get(name, default)
+    try:
+        value = parse(raw)
+        if is_valid(value):
+            return value
+    except ValueError:
+        pass
+    _invalid_settings.append(f"{name}={raw!r}")
+    return parse(default)
+
+
+# --- Environment Variables ---
+# プロファイルを取得する呼び出しの割合(0.0〜1.0)。0の場合はハンドラを一切ラップしない
+PROFILING_SAMPLE_RATE = _env_setting(
+    "PROFILING_SAMPLE_RATE", "0", float, lambda rate: 0 <= rate <= 1
+)
+# プロファイル結果の出力先ディレクトリ
+PROFILING_DIR = os.environ.get("PROFILING_DIR", "/tmp/profiles")
+# 出力後に呼び出すシンク("module.path:function")。function(summary, artifact_paths)
+PROFILING_SINK = os.environ.get("PROFILING_SINK")
+# ログ・レポートに出力する上位項目数
+PROFILING_TOP_N = _env_setting("PROFILING_TOP_N", "10", int, lambda n: n > 0)
+# /tmpを使い切らないよう、ディレクトリに残すプロファイル数の上限
+PROFILING_MAX_PROFILES = _env_setting(
+    "PROFILING_MAX_PROFILES", "20", int, lambda n: n > 0
+)
+
+# 設定が不正な場合は関数の起動を妨げないよう、プロファイリングを無効にする
+if _invalid_settings:
+    logger.error(
+        f"Invalid profiling settings {_invalid_settings}. Profiling is disabled."
+    )
+    PROFILING_SAMPLE_RATE = 0.0
+
+_sink: Callable | None = None
+
+
+def profiled(handler: Callable) -> Callable:
+    """lambda_handlerをラップし、サンプリングされた呼び出しのCPU/メモリプロファイルを取得する
+
+    PROFILING_SAMPLE_RATE が0(既定)の場合はハンドラをそのまま返すため、オーバーヘッドはない。
+    """
+    if PROFILING_SAMPLE_RATE <= 0:
+        return handler
+
+    logger.info(f"Profiling enabled with sample rate {PROFILING_SAMPLE_RATE}.")
+
+    @functools.wraps(handler)
+    def wrapper(event, context):
+        if random.random() >= PROFILING_SAMPLE_RATE:
+            return handler(event, context)
+        return _run_profiled(handler, event, context)
+
+    return wrapper
+
+
+def _run_profiled(handler: Callable, event, context):
+    request_id = getattr(context, "aws_request_id", None) or uuid.uuid4().hex
+    profiler = cProfile.Profile()
+    tracemalloc.start()
+    wall_started = time.perf_counter()
+    cpu_started = time.process_time()
+    try:
+        profiler.enable()
+        try:
+            return handler(event, context)
+        finally:
+            profiler.disable()
+    finally:
+        wall_ms = (time.perf_counter() - wall_started) * 1000
+        cpu_ms = (time.process_time() - cpu_started) * 1000
+        snapshot = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        try:
+            _export(request_id, profiler, snapshot, peak, wall_ms, cpu_ms)
+        except Exception as e:
+            logger.warning(f"Failed to export profile: {e}", exc_info=True)
+
+
+def _export(
+    request_id: str,
+    profiler: cProfile.Profile,
+    snapshot: tracemalloc.Snapshot,
+    peak: int,
+    wall_ms: float,
+    cpu_ms: float,
+) -> None:
+    os.makedirs(PROFILING_DIR, exist_ok=True)
+    _prune_old_profiles()
+
+    prof_path = os.path.join(PROFILING_DIR, f"{request_id}.prof")
+    profiler.dump_stats(prof_path)
+
+    stats_text = io.StringIO()
+    stats = pstats.Stats(profiler, stream=stats_text)
+    stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(PROFILING_TOP_N)
+    # プロファイラ自身による確保は除外する
+    snapshot = snapshot.filter_traces(
+        [
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+        ]
+    )
+    top_allocations = snapshot.statistics("lineno")[:PROFILING_TOP_N]
+
+    report_path = os.path.join(PROFILING_DIR, f"{request_id}.txt")
+    with open(report_path, "w") as f:
+        f.write(stats_text.getvalue())
+        f.write(f"\ntracemalloc peak: {peak / 1024:.1f} KiB\n")
+        for stat in top_allocations:
+            f.write(f"{stat}\n")
+
+    top_functions = sorted(
+        stats.stats.items(), key=lambda item: item[1][3], reverse=True
+    )[:PROFILING_TOP_N]
+    summary = {
+        "request_id": request_id,
+        "wall_ms": round(wall_ms, 1),
+        "cpu_ms": round(cpu_ms, 1),
+        "tracemalloc_peak_kib": round(peak / 1024, 1),
+        # Linuxではru_maxrssの単位はKiB
+        "max_rss_kib": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        "top_functions": [
+            {
+                "function": f"{filename}:{lineno}({name})",
+                "cumulative_ms": round(cumtime * 1000, 1),
+            }
+            for (filename, lineno, name), (_, _, _, cumtime, _) in top_functions
+        ],
+        "top_allocations": [
+            {
+                "location": str(stat.traceback),
+                "size_kib": round(stat.size / 1024, 1),
+            }
+            for stat in top_allocations
+        ],
+    }
+    artifacts = [prof_path, report_path]
+    logger.info(f"Profile summary: {json.dumps(summary)}")
+
+    sink = _load_sink()
+    if sink:
+        sink(summary, artifacts)
+
+
+def _prune_old_profiles() -> None:
+    """古いプロファイルから削除し、残すプロファイル数を上限以下に保つ"""
+    profiles = sorted(
+        (
+            os.path.join(PROFILING_DIR, name)
+            for name in os.listdir(PROFILING_DIR)
+            if name.endswith(".prof")
+        ),
+        key=os.path.getmtime,
+    )
+    for prof_path in profiles[: max(0, len(profiles) - PROFILING_MAX_PROFILES + 1)]:
+        for path in (prof_path, prof_path[: -len(".prof")] + ".txt"):
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def _load_sink() -> Callable | None:
+    global _sink
+    if _sink is None and PROFILING_SINK:
+        module_path, _, func_name = PROFILING_SINK.partition(":")
+        _sink = getattr(importlib.import_module(module_path), func_name)
+    return _sink
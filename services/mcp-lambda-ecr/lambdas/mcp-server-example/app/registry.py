@@ -0,0 +1,266 @@
+import asyncio
+import importlib
+import inspect
+import json
+import logging
+import os
+import sys
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+# ツール名の名前空間の区切り文字 (例: databricks__execute_sql_query)
+NAMESPACE_SEPARATOR = "__"
+
+# バックエンドのモジュールがこの名前の関数を公開していれば、ウォームアップ時に呼び出す
+# (例: Databricksの接続プールを確立する。データには触れないこと)
+WARMUP_HOOK_NAME = "warm_up"
+
+# MCP_SERVERS が未設定の場合にラップするMCPサーバー
+DEFAULT_MCP_SERVERS = {
+    "databricks": {"module": "mcp_databricks_server.main", "object": "mcp"},
+}
+
+# イメージのビルド時に生成するツール定義のカタログ(python -m app.registry で生成する)
+# カタログにあるバックエンドは、ツールが実行されるまでモジュールをimportしない
+CATALOG_PATH = os.path.join(os.path.dirname(__file__), "tool_catalog.json")
+
+
+class MCPBackend:
+    """単一のMCPサーバーモジュールを表すバックエンド
+
+    ツール定義はビルド時のカタログから取得し、モジュールはツールの実行時に初めてimportする。
+    カタログにない場合は、ツール定義が必要になった時点でimportして取得する。
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        module_path: str,
+        object_name: str = "mcp",
+        definitions: list[dict] | None = None,
+    ):
+        self.namespace = namespace
+        self.module_path = module_path
+        self.object_name = object_name
+        self._module = None
+        self._definitions = definitions
+
+    def load(self):
+        """MCPサーバーモジュールをimportする(初回のみ)"""
+        if self._module is None:
+            logger.info(
+                f"Loading MCP backend '{self.namespace}' from '{self.module_path}'."
+            )
+            self._module = importlib.import_module(self.module_path)
+        return self._module
+
+    async def definitions(self) -> list[dict]:
+        """名前空間付きのツール定義を返す"""
+        if self._definitions is None:
+            self._definitions = await self._discover_definitions()
+        return self._definitions
+
+    async def get_function(self, tool_name: str) -> Callable | None:
+        """ツール定義にあるツールの関数を返す。モジュールのimportはここで行う"""
+        if not any(
+            definition["function"]["name"] == tool_name
+            for definition in await self.definitions()
+        ):
+            return None
+        _, _, name = tool_name.partition(NAMESPACE_SEPARATOR)
+        tool_func = getattr(self.load(), name, None)
+        return tool_func if callable(tool_func) else None
+
+    async def warm_up(self) -> str:
+        """モジュールのimportとツール定義の取得を行い、ウォームアップフックがあれば呼び出す"""
+        await self.definitions()
+        hook = getattr(self.load(), WARMUP_HOOK_NAME, None)
+        if not callable(hook):
+            return "loaded"
+        result = hook()
+        if inspect.isawaitable(result):
+            await result
+        return "warmed"
+
+    async def _discover_definitions(self) -> list[dict]:
+        module = self.load()
+        server = getattr(module, self.object_name)
+        definitions = []
+        for tool in await server.list_tools():
+            if not callable(getattr(module, tool.name, None)):
+                logger.warning(
+                    f"Skipping tool '{tool.name}' of backend '{self.namespace}':"
+                    " no module-level function with the same name."
+                )
+                continue
+            definitions.append(
+                {
+                    "type": "function",
+                    "function": {
+                        "name": f"{self.namespace}{NAMESPACE_SEPARATOR}{tool.name}",
+                        "description": tool.description or "",
+                        "parameters": tool.inputSchema,
+                    },
+                }
+            )
+        logger.info(
+            f"Discovered {len(definitions)} tools from MCP backend '{self.namespace}'."
+        )
+        return definitions
+
+
+def load_catalog(path: str) -> dict:
+    """ビルド時に生成したカタログを読み込む。存在しない・読めない場合は空の辞書を返す"""
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        logger.warning(f"Ignoring unreadable tool catalog '{path}': {e}")
+        return {}
+
+
+class ToolRegistry:
+    """複数のMCPサーバーのツールを名前空間付きで束ねるレジストリ"""
+
+    def __init__(self, backends: list[MCPBackend]):
+        self._backends = {backend.namespace: backend for backend in backends}
+        self._definitions: list[dict] | None = None
+        self._sse_catalog: str | None = None
+        # 直近のツール一覧の取得に失敗したバックエンドの名前空間
+        self.unavailable_backends: list[str] = []
+
+    @classmethod
+    def from_config(
+        cls, config_json: str | None, catalog_path: str = CATALOG_PATH
+    ) -> "ToolRegistry":
+        """MCP_SERVERS形式のJSON({namespace: {module, object}})からレジストリを生成する
+
+        同じモジュールを指すカタログのエントリがあれば、そのツール定義を使う。
+        """
+        config = json.loads(config_json) if config_json else DEFAULT_MCP_SERVERS
+        catalog = load_catalog(catalog_path)
+        backends = []
+        for namespace, settings in config.items():
+            module_path = settings["module"]
+            object_name = settings.get("object", "mcp")
+            entry = catalog.get(namespace, {})
+            if (entry.get("module"), entry.get("object")) != (module_path, object_name):
+                entry = {}
+            backends.append(
+                MCPBackend(
+                    namespace=namespace,
+                    module_path=module_path,
+                    object_name=object_name,
+                    definitions=entry.get("tools"),
+                )
+            )
+        if not backends:
+            raise ValueError("No MCP backends are configured.")
+        return cls(backends)
+
+    async def get_tool(self, tool_name: str | None) -> Callable | None:
+        """ツール名に対応する関数を返す。対象のバックエンドのみをロードする"""
+        namespace, separator, _ = (tool_name or "").partition(NAMESPACE_SEPARATOR)
+        backend = self._backends.get(namespace)
+        if not separator or backend is None:
+            return None
+        return await backend.get_function(tool_name)
+
+    async def list_tools(self) -> list[dict]:
+        """全バックエンドのツール定義を返す(コンテナごとに一度だけ算出する)
+
+        ツール一覧を取得できなかったバックエンドはログに記録して除外する。
+        その場合の一覧はキャッシュせず、次回の呼び出しで失敗したバックエンドを再試行する。
+        """
+        if self._definitions is not None:
+            return self._definitions
+        definitions = []
+        unavailable = []
+        for backend in self._backends.values():
+            try:
+                definitions.extend(await backend.definitions())
+            except Exception as e:
+                logger.error(
+                    f"Failed to list tools of MCP backend '{backend.namespace}': {e}",
+                    exc_info=True,
+                )
+                unavailable.append(backend.namespace)
+        self.unavailable_backends = unavailable
+        if not unavailable:
+            self._definitions = definitions
+        return definitions
+
+    async def tools_list_result(self) -> dict:
+        """tools/list のresultを返す
+
+        一部のバックエンドが欠けている場合は、呼び出し側が一覧が不完全だと分かるよう
+        その名前空間を unavailable_backends に含める。
+        """
+        result = {"tools": await self.list_tools()}
+        if self.unavailable_backends:
+            result["unavailable_backends"] = self.unavailable_backends
+        return result
+
+    async def warm_up(self) -> dict[str, str]:
+        """全バックエンドをウォームアップし、名前空間ごとの結果を返す"""
+        results = {}
+        for namespace, backend in self._backends.items():
+            try:
+                results[namespace] = await backend.warm_up()
+            except Exception as e:
+                logger.error(
+                    f"Failed to warm up MCP backend '{namespace}': {e}", exc_info=True
+                )
+                results[namespace] = f"failed: {e}"
+        return results
+
+    async def sse_catalog(self) -> str:
+        """ツール一覧のSSEレスポンスを返す(シリアライズはコンテナごとに一度だけ行う)"""
+        if self._sse_catalog is not None:
+            return self._sse_catalog
+        response = {
+            "jsonrpc": "2.0",
+            "id": "0",
+            "result": await self.tools_list_result(),
+        }
+        catalog = f"data: {json.dumps(response)}\n\n"
+        # 一部のバックエンドが欠けた一覧はキャッシュしない
+        if self._definitions is not None:
+            self._sse_catalog = catalog
+        return catalog
+
+    async def build_catalog(self) -> dict:
+        """各バックエンドをimportしてツール定義を取得し、カタログを生成する
+
+        importできないバックエンド(ビルド時に設定がない場合など)はカタログから除外し、
+        実行時に従来どおりimportしてツール定義を取得させる。
+        """
+        catalog = {}
+        for namespace, backend in self._backends.items():
+            try:
+                tools = await backend.definitions()
+            except Exception as e:
+                logger.warning(
+                    f"Leaving MCP backend '{namespace}' out of the tool catalog: {e}"
+                )
+                continue
+            catalog[namespace] = {
+                "module": backend.module_path,
+                "object": backend.object_name,
+                "tools": tools,
+            }
+        return catalog
+
+
+if __name__ == "__main__":
+    # イメージのビルド時に実行する: python -m app.registry [出力先]
+    logging.basicConfig(level=logging.INFO)
+    output_path = sys.argv[1] if len(sys.argv) > 1 else CATALOG_PATH
+    # 既存のカタログは読まず、各モジュールから取得し直す
+    registry = ToolRegistry.from_config(os.environ.get("MCP_SERVERS"), catalog_path="")
+    with open(output_path, "w") as f:
+        json.dump(asyncio.run(registry.build_catalog()), f)
+    logger.info(f"Wrote tool catalog to '{output_path}'.")
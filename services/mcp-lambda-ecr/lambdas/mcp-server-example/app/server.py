@@ -1,6 +1,8 @@
+import inspect
 import json
 import logging
 
+from app.registry import ToolRegistry
 from fastapi import Depends
 from fastapi import FastAPI
 from fastapi import HTTPException
@@ -10,122 +12,104 @@ from fastapi.responses import JSONResponse
 from fastapi.responses import StreamingResponse
 from fastapi.security import APIKeyHeader
 
-# mcp-databricks-serverから、ツールとして公開されている個々の関数を直接インポートします
-try:
-    from mcp_databricks_server.main import describe_table
-    from mcp_databricks_server.main import execute_sql_query
-    from mcp_databricks_server.main import list_schemas
-    from mcp_databricks_server.main import list_tables
+logger = logging.getLogger(__name__)
 
-    logging.info("Successfully imported tool functions from mcp_databricks_server.main")
-except ImportError as e:
-    logging.error(f"Could not import tool functions: {e}. Check PYTHONPATH.")
-    # エラー時にはNoneを設定し、起動時に検知できるようにします
-    execute_sql_query = list_schemas = list_tables = describe_table = None
+# JSON-RPCのエラーコード
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INTERNAL_ERROR = -32603
+UNAUTHORIZED = -32001
+
+# ツール一覧を返すJSON-RPCメソッド名
+TOOLS_LIST_METHOD = "tools/list"
+
+
+def jsonrpc_error(request_id, code: int, message: str, data=None) -> dict:
+    """JSON-RPCのエラーレスポンスを生成する"""
+    error = {"code": code, "message": message}
+    if data is not None:
+        error["data"] = data
+    return {"jsonrpc": "2.0", "id": request_id, "error": error}
+
+
+async def call_tool(registry: ToolRegistry, body: dict) -> dict:
+    """JSON-RPCリクエストのツールを実行し、JSON-RPCレスポンスを返す"""
+    tool_name = body.get("method")
+    params = body.get("params", {})
+    request_id = body.get("id", "1")
+
+    try:
+        tool_func = await registry.get_tool(tool_name)
+        if not tool_func:
+            return jsonrpc_error(
+                request_id, METHOD_NOT_FOUND, f"Tool '{tool_name}' not found."
+            )
+
+        result = tool_func(**params)
+        if inspect.isawaitable(result):
+            result = await result
+        logger.info(f"Tool '{tool_name}' executed successfully. Returning result.")
+        return {"jsonrpc": "2.0", "id": request_id, "result": result}
+    except Exception as e:
+        logger.error(f"Error executing tool '{tool_name}': {e}", exc_info=True)
+        return jsonrpc_error(
+            request_id, INTERNAL_ERROR, "Internal server error", str(e)
+        )
 
-logger = logging.getLogger(__name__)
 
-# クライアント(Agent)に提示するツール定義リストを、ラッパー側で明示的に記述します
-TOOL_DEFINITIONS = [
-    {
-        "type": "function",
-        "function": {
-            "name": "execute_sql_query",
-            "description": "Execute a SQL query on Databricks and return the results.",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "sql": {
-                        "type": "string",
-                        "description": "The SQL query to execute.",
-                    }
-                },
-                "required": ["sql"],
-            },
-        },
-    },
-    {
-        "type": "function",
-        "function": {
-            "name": "list_schemas",
-            "description": (
-                "List all available schemas in a specific catalog on Databricks."
-            ),
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "catalog": {
-                        "type": "string",
-                        "description": "The name of the catalog.",
-                    }
-                },
-                "required": ["catalog"],
-            },
-        },
-    },
-    {
-        "type": "function",
-        "function": {
-            "name": "list_tables",
-            "description": "List all tables in a specific schema on Databricks.",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "schema": {
-                        "type": "string",
-                        "description": (
-                            "The name of the schema (e.g., 'catalog_name.schema_name')."
-                        ),
-                    }
-                },
-                "required": ["schema"],
-            },
-        },
-    },
-    {
-        "type": "function",
-        "function": {
-            "name": "describe_table",
-            "description": "Describe a table's schema on Databricks.",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "table_name": {
-                        "type": "string",
-                        "description": (
-                            "The full name of the table (e.g., 'catalog.schema.table')."
-                        ),
-                    }
-                },
-                "required": ["table_name"],
-            },
-        },
-    },
-]
-
-
-def create_app(auth_api_key: str | None) -> FastAPI:
+def is_direct_invocation(event) -> bool:
+    """Lambda間の直接呼び出し(JSON-RPCイベント)かどうかを判定する
+
+    API Gatewayプロキシ形式のイベントはhttpMethodなどを持ち、jsonrpcキーを持たない。
+    """
+    return isinstance(event, dict) and event.get("jsonrpc") == "2.0"
+
+
+async def handle_direct_invocation(
+    event: dict, registry: ToolRegistry, auth_api_key: str | None
+) -> dict:
+    """直接呼び出しのJSON-RPCイベントをMangum/FastAPIを経由せずに処理する"""
+    method = event.get("method")
+    request_id = event.get("id", "1")
+    logger.info(f"Received direct invocation for method '{method}'.")
+
+    if auth_api_key and event.get("api_key") != auth_api_key:
+        return jsonrpc_error(request_id, UNAUTHORIZED, "Invalid API Key")
+
+    if not method:
+        return jsonrpc_error(request_id, INVALID_REQUEST, "Method not provided.")
+
+    if method == TOOLS_LIST_METHOD:
+        return {
+            "jsonrpc": "2.0",
+            "id": request_id,
+            "result": await registry.tools_list_result(),
+        }
+
+    response = await call_tool(registry, event)
+    # 直接呼び出しではレスポンスをLambdaランタイムがシリアライズする。
+    # そこで失敗すると(例: SQLの結果に含まれるdatetime)FunctionErrorとなるため、
+    # ここで検出してツールのエラーとして返す
+    try:
+        json.dumps(response)
+    except (TypeError, ValueError) as e:
+        logger.error(
+            f"Result of tool '{method}' is not JSON serializable: {e}", exc_info=True
+        )
+        return jsonrpc_error(
+            request_id, INTERNAL_ERROR, "Internal server error", str(e)
+        )
+    return response
+
+
+def create_app(auth_api_key: str | None, registry: ToolRegistry) -> FastAPI:
     """FastAPIラッパーアプリケーションを生成するファクトリ関数"""
     app = FastAPI(
-        title="Databricks MCP Server Wrapper",
-        description="A wrapper for mcp-databricks-server running on AWS Lambda.",
+        title="MCP Server Wrapper",
+        description="A wrapper for MCP servers running on AWS Lambda.",
         version="1.0.0",
     )
 
-    if not all([execute_sql_query, list_schemas, list_tables, describe_table]):
-        raise RuntimeError(
-            "One or more tool functions could not be imported from"
-            " mcp_databricks_server."
-        )
-
-    # ツール名とインポートした関数を紐付けるディスパッチテーブル（呼び出し辞書）
-    dispatch_table = {
-        "execute_sql_query": execute_sql_query,
-        "list_schemas": list_schemas,
-        "list_tables": list_tables,
-        "describe_table": describe_table,
-    }
-
     # APIキー認証の仕組み
     api_key_header = APIKeyHeader(name="X-Api-Key", auto_error=False)
 
@@ -143,43 +127,21 @@ def create_app(auth_api_key: str | None) -> FastAPI:
         if request.method == "GET":
             logger.info("Received GET request for tool list.")
             async def tool_list_generator():
-                response = {"jsonrpc": "2.0", "id": "0", "result": {"tools": TOOL_DEFINITIONS}}
-                yield f"data: {json.dumps(response)}\n\n"
+                yield await registry.sse_catalog()
             return StreamingResponse(tool_list_generator(), media_type="text/event-stream")
 
         # POSTリクエスト：ツールを実行する
         if request.method == "POST":
             body = await request.json()
             logger.info(f"Received POST request to execute tool: {json.dumps(body)}")
-            tool_name = body.get("method")
-            params = body.get("params", {})
-            request_id = body.get("id", "1")
-
-            tool_func = dispatch_table.get(tool_name)
-            if not tool_func:
+            response = await call_tool(registry, body)
+            if response.get("error", {}).get("code") == METHOD_NOT_FOUND:
                 raise HTTPException(
-                    status_code=404, detail=f"Tool '{tool_name}' not found."
+                    status_code=404, detail=response["error"]["message"]
                 )
 
-            try:
-                result = await tool_func(**params)
-                logger.info(f"Tool '{tool_name}' executed successfully. Returning result.")
-                return JSONResponse(
-                    content={"jsonrpc": "2.0", "id": request_id, "result": result}
-                )
-            except Exception as e:
-                logger.error(f"Error executing tool '{tool_name}': {e}", exc_info=True)
-                return JSONResponse(
-                    status_code=500,
-                    content={
-                        "jsonrpc": "2.0",
-                        "id": request_id,
-                        "error": {
-                            "code": -32603,
-                            "message": "Internal server error",
-                            "data": str(e),
-                        },
-                    },
-                )
+            return JSONResponse(
+                status_code=500 if "error" in response else 200, content=response
+            )
 
     return app
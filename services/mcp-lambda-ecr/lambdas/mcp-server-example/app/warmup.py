@@ -0,0 +1,157 @@
+import json
+import logging
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List
+
+import boto3
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+# コンテナを識別するID。ファンアウト時に何個のコンテナが温まったかを数えるために使う
+CONTAINER_ID = uuid.uuid4().hex[:12]
+MAX_WARMUP_CONCURRENCY = 50
+# ファンアウトされたpingは、兄弟のpingが別コンテナに割り当てられるよう少しの間処理を保持する
+DEFAULT_HOLD_MS = 100
+MAX_HOLD_MS = 5000
+
+_lambda_client = None
+# コンテナの初期化時にTrueとなり、最初の呼び出し(種類を問わない)で解除される
+_cold_start = True
+
+
+def consume_cold_start() -> bool:
+    """このコンテナで最初の呼び出しであればTrueを返す。lambda_handlerの先頭で毎回呼び出す"""
+    global _cold_start
+    cold_start, _cold_start = _cold_start, False
+    return cold_start
+
+
+def is_warmup_event(event) -> bool:
+    """ウォームアップ用のイベント({"warmup": {...}})かどうかを判定する"""
+    return isinstance(event, dict) and "warmup" in event
+
+
+def run_step(func: Callable[[], Any]) -> Dict[str, Any]:
+    """ウォームアップの1ステップを実行し、所要時間と結果を返す"""
+    started = time.perf_counter()
+    try:
+        detail = func()
+        step = {"ok": True}
+        if detail is not None:
+            step["detail"] = detail
+    except Exception as e:
+        logger.warning(f"Warm-up step failed: {e}", exc_info=True)
+        step = {"ok": False, "error": str(e)}
+    step["ms"] = round((time.perf_counter() - started) * 1000, 1)
+    return step
+
+
+def _int_setting(
+    settings: Dict, key: str, default: int, low: int, high: int, problems: List[str]
+) -> int:
+    """ウォームアップ設定の整数値を読み取る。不正・範囲外の値は補正し、problemsに記録する"""
+    value = settings.get(key, default)
+    try:
+        if isinstance(value, bool):
+            raise TypeError
+        number = int(value)
+    except (TypeError, ValueError):
+        problems.append(f"{key}={value!r} is not an integer; using {default}.")
+        return default
+    clamped = max(low, min(high, number))
+    if clamped != number:
+        problems.append(
+            f"{key}={number} is out of range [{low}, {high}]; using {clamped}."
+        )
+    return clamped
+
+
+def _invoke_self(function_name: str, hold_ms: int) -> Dict[str, Any]:
+    global _lambda_client
+    if _lambda_client is None:
+        _lambda_client = boto3.client("lambda")
+    response = _lambda_client.invoke(
+        FunctionName=function_name,
+        Payload=json.dumps(
+            {"warmup": {"concurrency": 1, "hold_ms": hold_ms}}
+        ).encode("utf-8"),
+        InvocationType="RequestResponse",
+    )
+    return json.loads(response["Payload"].read().decode("utf-8"))
+
+
+def handle_warmup(
+    event: Dict,
+    context,
+    warm: Callable[[], Dict[str, Dict[str, Any]]],
+    cold_start: bool,
+) -> Dict[str, Any]:
+    """ウォームアップイベントを処理し、準備状況のレポートを返す
+
+    concurrency が2以上の場合は自分自身を (concurrency - 1) 回並列に呼び出し、
+    合計 concurrency 個のコンテナを温めてレポートを集約する。
+    cold_start には consume_cold_start() の結果を渡す。
+    """
+    problems: List[str] = []
+    settings = event.get("warmup")
+    if not isinstance(settings, dict):
+        if settings not in (None, True):
+            problems.append(f"warmup={settings!r} is not an object; using defaults.")
+        settings = {}
+    concurrency = _int_setting(
+        settings, "concurrency", 1, 1, MAX_WARMUP_CONCURRENCY, problems
+    )
+    hold_ms = _int_setting(settings, "hold_ms", DEFAULT_HOLD_MS, 0, MAX_HOLD_MS, problems)
+    if problems:
+        logger.warning(f"Invalid warm-up settings: {problems}")
+    function_name = getattr(context, "function_name", None)
+
+    with ThreadPoolExecutor(max_workers=max(1, concurrency - 1)) as executor:
+        peers = []
+        if concurrency > 1 and function_name:
+            logger.info(f"Fanning out {concurrency - 1} warm-up pings.")
+            peers = [
+                executor.submit(_invoke_self, function_name, hold_ms)
+                for _ in range(concurrency - 1)
+            ]
+
+        steps = warm()
+        report = {
+            "container_id": CONTAINER_ID,
+            "cold_start": cold_start,
+            "ready": all(step["ok"] for step in steps.values()),
+            "steps": steps,
+        }
+        if problems:
+            report["invalid_settings"] = problems
+        if not peers:
+            time.sleep(hold_ms / 1000)
+            logger.info(f"Warm-up report: {json.dumps(report)}")
+            return report
+
+        reports = [report]
+        for peer in peers:
+            try:
+                reports.append(peer.result())
+            except Exception as e:
+                logger.warning(f"Warm-up ping failed: {e}")
+                reports.append({"ready": False, "error": str(e)})
+
+    summary = {
+        "requested": concurrency,
+        "containers": len({r["container_id"] for r in reports if "container_id" in r}),
+        "ready": sum(1 for r in reports if r.get("ready")),
+        "cold_starts": sum(1 for r in reports if r.get("cold_start")),
+        "reports": reports,
+    }
+    if problems:
+        summary["invalid_settings"] = problems
+    logger.info(
+        f"Warm-up summary: requested={summary['requested']}"
+        f" containers={summary['containers']} ready={summary['ready']}"
+        f" cold_starts={summary['cold_starts']}"
+    )
+    return summary
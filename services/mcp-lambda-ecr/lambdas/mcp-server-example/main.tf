@@ -129,6 +129,15 @@ resource "aws_iam_policy" "lambda_exec_policy" {
           aws_secretsmanager_secret.config.arn,
           data.aws_secretsmanager_secret_version.network_config.arn
         ]
+      },
+      {
+        Sid    = "LambdaInvokeSelf",
+        Action = "lambda:InvokeFunction",
+        Effect = "Allow",
+        Resource = [
+          # Warm-up pings fan out by invoking this function itself
+          "arn:aws:lambda:${var.aws_region}:${data.aws_caller_identity.current.account_id}:function:${local.lambda_function_name}"
+        ]
       }
     ]
   })
@@ -185,10 +194,15 @@ resource "aws_lambda_function" "this" {
 
   environment {
     variables = {
-      COMMON_SECRET_NAME = data.aws_secretsmanager_secret_version.common.secret_id
-      CONFIG_SECRET_NAME = local.config_secret_name
-      MCP_MODULE_PATH    = "mcp_databricks_server.main"
-      MCP_OBJECT_NAME    = "mcp"
+      COMMON_SECRET_NAME    = data.aws_secretsmanager_secret_version.common.secret_id
+      CONFIG_SECRET_NAME    = local.config_secret_name
+      PROFILING_SAMPLE_RATE = var.profiling_sample_rate
+      MCP_SERVERS           = jsonencode({
+        databricks = {
+          module = "mcp_databricks_server.main"
+          object = "mcp"
+        }
+      })
     }
   }
 }
@@ -199,3 +213,36 @@ resource "aws_lambda_function" "this" {
 data "aws_secretsmanager_secret_version" "network_config" {
   secret_id = "${var.project_name}/${var.environment}/network-config"
 }
+
+# --------------------
+# Resources for scheduled warm-up
+#
+resource "aws_cloudwatch_event_rule" "warmup" {
+  count = var.warmup_schedule_expression != null ? 1 : 0
+
+  name                = "${local.lambda_function_name}-warmup"
+  description         = "Scheduled warm-up pings for ${local.lambda_function_name}"
+  schedule_expression = var.warmup_schedule_expression
+}
+
+resource "aws_cloudwatch_event_target" "warmup" {
+  count = var.warmup_schedule_expression != null ? 1 : 0
+
+  rule = aws_cloudwatch_event_rule.warmup[0].name
+  arn  = aws_lambda_function.this.arn
+  input = jsonencode({
+    warmup = {
+      concurrency = var.warmup_concurrency
+    }
+  })
+}
+
+resource "aws_lambda_permission" "warmup" {
+  count = var.warmup_schedule_expression != null ? 1 : 0
+
+  statement_id  = "AllowExecutionFromEventBridgeWarmup"
+  action        = "lambda:InvokeFunction"
+  function_name = aws_lambda_function.this.function_name
+  principal     = "events.amazonaws.com"
+  source_arn    = aws_cloudwatch_event_rule.warmup[0].arn
+}
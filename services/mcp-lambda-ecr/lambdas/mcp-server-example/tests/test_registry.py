@@ -0,0 +1,165 @@
+import asyncio
+import json
+from types import ModuleType
+from types import SimpleNamespace
+
+import pytest
+from app import registry
+from app.registry import ToolRegistry
+
+SCHEMA = {"type": "object", "properties": {}}
+
+
+def fake_mcp_module(name: str, *tool_names: str) -> ModuleType:
+    """FastMCPサーバー(mcp)とツール関数を公開するモジュールを生成する"""
+    module = ModuleType(name)
+
+    async def list_tools():
+        return [
+            SimpleNamespace(name=tool, description=tool, inputSchema=SCHEMA)
+            for tool in tool_names
+        ]
+
+    module.mcp = SimpleNamespace(list_tools=list_tools)
+    for tool in tool_names:
+        setattr(module, tool, lambda tool=tool: f"{name}.{tool}")
+    module.helper = lambda: "not a tool"
+    return module
+
+
+def definition(name: str) -> dict:
+    description = name.partition(registry.NAMESPACE_SEPARATOR)[2]
+    return {
+        "type": "function",
+        "function": {"name": name, "description": description, "parameters": SCHEMA},
+    }
+
+
+def config(*namespaces: str) -> str:
+    return json.dumps(
+        {namespace: {"module": f"{namespace}_module"} for namespace in namespaces}
+    )
+
+
+@pytest.fixture
+def modules(monkeypatch):
+    """importlib.import_module を差し替え、importされたモジュール名を記録する"""
+    available = {
+        "alpha_module": fake_mcp_module("alpha_module", "ping"),
+        "beta_module": fake_mcp_module("beta_module", "echo"),
+    }
+    imported = []
+
+    def import_module(name):
+        imported.append(name)
+        if name not in available:
+            raise ImportError(f"No module named '{name}'")
+        return available[name]
+
+    monkeypatch.setattr(registry.importlib, "import_module", import_module)
+    return SimpleNamespace(available=available, imported=imported)
+
+
+@pytest.fixture
+def catalog_path(tmp_path):
+    path = tmp_path / "tool_catalog.json"
+    path.write_text(
+        json.dumps(
+            {
+                "alpha": {
+                    "module": "alpha_module",
+                    "object": "mcp",
+                    "tools": [definition("alpha__ping")],
+                },
+                "beta": {
+                    "module": "beta_module",
+                    "object": "mcp",
+                    "tools": [definition("beta__echo")],
+                },
+            }
+        )
+    )
+    return str(path)
+
+
+def test_catalog_lists_tools_without_importing(modules, catalog_path):
+    tool_registry = ToolRegistry.from_config(config("alpha", "beta"), catalog_path)
+
+    tools = asyncio.run(tool_registry.list_tools())
+    assert [tool["function"]["name"] for tool in tools] == ["alpha__ping", "beta__echo"]
+    assert modules.imported == []
+
+
+def test_catalog_entry_for_other_module_is_ignored(modules, catalog_path):
+    modules.available["alpha_v2"] = fake_mcp_module("alpha_v2", "pong")
+    tool_registry = ToolRegistry.from_config(
+        json.dumps({"alpha": {"module": "alpha_v2"}}), catalog_path
+    )
+
+    tools = asyncio.run(tool_registry.list_tools())
+    assert [tool["function"]["name"] for tool in tools] == ["alpha__pong"]
+    assert modules.imported == ["alpha_v2"]
+
+
+def test_get_tool_imports_only_owning_backend(modules, catalog_path):
+    tool_registry = ToolRegistry.from_config(config("alpha", "beta"), catalog_path)
+
+    tool_func = asyncio.run(tool_registry.get_tool("alpha__ping"))
+    assert tool_func() == "alpha_module.ping"
+    assert modules.imported == ["alpha_module"]
+
+
+@pytest.mark.parametrize(
+    "tool_name", ["alpha__helper", "alpha__mcp", "alpha__echo", "gamma__ping", "ping"]
+)
+def test_get_tool_rejects_names_outside_catalog(modules, catalog_path, tool_name):
+    tool_registry = ToolRegistry.from_config(config("alpha", "beta"), catalog_path)
+
+    assert asyncio.run(tool_registry.get_tool(tool_name)) is None
+    assert modules.imported == []
+
+
+def test_partial_catalog_is_reported_and_not_cached(modules):
+    tool_registry = ToolRegistry.from_config(config("alpha", "gamma"), catalog_path="")
+
+    result = asyncio.run(tool_registry.tools_list_result())
+    assert [tool["function"]["name"] for tool in result["tools"]] == ["alpha__ping"]
+    assert result["unavailable_backends"] == ["gamma"]
+    assert "gamma__ping" not in asyncio.run(tool_registry.sse_catalog())
+
+    modules.available["gamma_module"] = fake_mcp_module("gamma_module", "ping")
+    result = asyncio.run(tool_registry.tools_list_result())
+    assert len(result["tools"]) == 2
+    assert "unavailable_backends" not in result
+    assert "gamma__ping" in asyncio.run(tool_registry.sse_catalog())
+
+
+def test_warm_up_reports_failed_backend(modules):
+    tool_registry = ToolRegistry.from_config(config("alpha", "gamma"), catalog_path="")
+
+    results = asyncio.run(tool_registry.warm_up())
+    assert results["alpha"] == "loaded"
+    assert results["gamma"].startswith("failed:")
+
+
+def test_build_catalog_skips_backends_that_fail_to_import(modules):
+    tool_registry = ToolRegistry.from_config(
+        config("alpha", "gamma", "beta"), catalog_path=""
+    )
+
+    catalog = asyncio.run(tool_registry.build_catalog())
+    assert list(catalog) == ["alpha", "beta"]
+    assert catalog["alpha"] == {
+        "module": "alpha_module",
+        "object": "mcp",
+        "tools": [definition("alpha__ping")],
+    }
+
+
+def test_unreadable_catalog_falls_back_to_import(modules, tmp_path):
+    path = tmp_path / "tool_catalog.json"
+    path.write_text("{not json")
+    tool_registry = ToolRegistry.from_config(config("alpha"), str(path))
+
+    assert len(asyncio.run(tool_registry.list_tools())) == 1
+    assert modules.imported == ["alpha_module"]
@@ -0,0 +1,35 @@
+import asyncio
+import datetime
+import json
+
+import pytest
+
+pytest.importorskip("fastapi")
+
+from app.server import INTERNAL_ERROR  # noqa: E402
+from app.server import handle_direct_invocation  # noqa: E402
+
+
+class FakeRegistry:
+    def __init__(self, result):
+        self.result = result
+
+    async def get_tool(self, tool_name):
+        return lambda: self.result
+
+
+def invoke(result) -> dict:
+    event = {"jsonrpc": "2.0", "method": "example__query", "id": "7"}
+    return asyncio.run(handle_direct_invocation(event, FakeRegistry(result), None))
+
+
+def test_serializable_result_is_returned():
+    response = invoke([{"id": 1}])
+    assert response == {"jsonrpc": "2.0", "id": "7", "result": [{"id": 1}]}
+
+
+def test_unserializable_result_becomes_jsonrpc_error():
+    response = invoke([{"created_at": datetime.datetime(2025, 1, 1)}])
+    assert response["id"] == "7"
+    assert response["error"]["code"] == INTERNAL_ERROR
+    json.dumps(response)
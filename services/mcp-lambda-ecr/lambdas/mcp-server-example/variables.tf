@@ -51,3 +51,26 @@ variable "lambda_architecture" {
   type        = string
   default     = "arm64"
 }
+
+variable "warmup_schedule_expression" {
+  description = "EventBridge schedule expression for warm-up pings (e.g. rate(5 minutes)). Disabled when null."
+  type        = string
+  default     = null
+}
+
+variable "warmup_concurrency" {
+  description = "Number of containers to keep warm with each scheduled warm-up ping."
+  type        = number
+  default     = 1
+}
+
+variable "profiling_sample_rate" {
+  description = "Fraction of invocations (0.0-1.0) to profile with cProfile and tracemalloc. 0 disables profiling."
+  type        = number
+  default     = 0
+
+  validation {
+    condition     = var.profiling_sample_rate >= 0 && var.profiling_sample_rate <= 1
+    error_message = "profiling_sample_rate must be between 0 and 1."
+  }
+}